@@ -3,46 +3,134 @@
 Phase 1.5 Chess Engine (alpha-beta pruning, algebraic input with case sensitivity)
 
 Features:
+- Bitboard board representation (one 64-bit int per piece type/color)
 - Algebraic input: e4, Nf3, exd5, nf6 (lowercase piece letter => black piece)
 - Turn enforcement (white_to_move)
 - Full pseudo-legal move generation for all pieces (no castling/en-passant/promotion)
 - Filters moves that leave own king in check
-- Alpha-beta search for `go depth N`
+- Iterative-deepening alpha-beta search with a Zobrist-keyed transposition table for `go depth N`
+- Capture-only quiescence search at the leaves
 - Perft for correctness testing
 - Simple material evaluation
 """
 
-import copy
 import time
 import math
+import random
 
 # -------------------------
 # Constants / Helpers
 # -------------------------
 WHITE_PIECES = set("PRNBQK")
 BLACK_PIECES = set("prnbqk")
-PIECE_VALUES = {'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 20000}
+# piece indices into Position.bb (white 0..5, black 6..11)
+WP, WN, WB, WR, WQ, WK, BP, BN, BB, BR, BQ, BK = range(12)
+EMPTY = 12
+# material value by piece index, signed from white's point of view; EMPTY is worth 0
+PIECE_VALUES = [100, 320, 330, 500, 900, 20000, -100, -320, -330, -500, -900, -20000, 0]
+PIECE_CHARS = "PNBRQKpnbrqk"
+CHAR_TO_PIECE = {ch: i for i, ch in enumerate(PIECE_CHARS)}
+FULL_BB = (1 << 64) - 1
+
+def lsb(x):
+    """Index of the lowest set bit (x != 0)"""
+    return (x & -x).bit_length() - 1
+
+def msb(x):
+    """Index of the highest set bit (x != 0)"""
+    return x.bit_length() - 1
+
+def popcount(x):
+    return x.bit_count()
+
+# Zobrist keys: one per (piece, square) plus one toggled whenever the side to move changes
+_zobrist_rng = random.Random(0xC0FFEE)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+# Moves are packed into one int:
+#   bits 0..5 from square | 6..11 to square | 12..15 piece | 16..19 captured (EMPTY if quiet)
+def encode_move(frm, to, piece, captured):
+    return frm | (to << 6) | (piece << 12) | (captured << 16)
+
+def mv_from(m):
+    return m & 63
+
+def mv_to(m):
+    return (m >> 6) & 63
+
+def mv_piece(m):
+    return (m >> 12) & 15
+
+def mv_captured(m):
+    return (m >> 16) & 15
+
+class Position:
+    """
+    Bitboard position. Square index is row*8+col (row 0 = rank 8, col 0 = file a),
+    bit `sq` of bb[piece] is set when that piece stands on sq. `squares` mirrors the
+    bitboards as a flat 64-byte mailbox (piece index or EMPTY) for O(1) piece lookup.
+    """
+    def __init__(self):
+        self.bb = [0] * 12
+        self.squares = bytearray([EMPTY]) * 64
+        self.occ_w = 0
+        self.occ_b = 0
+        self.occ_all = 0
+        self.material = 0  # white material minus black material, kept by make/undo
+        self.hash = 0      # Zobrist key, includes ZOBRIST_SIDE when black is to move
+
+    def update_occupancy(self):
+        bb = self.bb
+        self.occ_w = bb[WP] | bb[WN] | bb[WB] | bb[WR] | bb[WQ] | bb[WK]
+        self.occ_b = bb[BP] | bb[BN] | bb[BB] | bb[BR] | bb[BQ] | bb[BK]
+        self.occ_all = self.occ_w | self.occ_b
+
+def board_from_rows(rows, white_to_move=True):
+    """rows: 8 strings (rank 8 first) using PIECE_CHARS and '.' -> Position"""
+    pos = Position()
+    for r, row in enumerate(rows):
+        for c, ch in enumerate(row):
+            if ch != '.':
+                p = CHAR_TO_PIECE[ch]
+                pos.bb[p] |= 1 << (r * 8 + c)
+                pos.squares[r * 8 + c] = p
+                pos.material += PIECE_VALUES[p]
+                pos.hash ^= ZOBRIST[p][r * 8 + c]
+    if not white_to_move:
+        pos.hash ^= ZOBRIST_SIDE
+    pos.update_occupancy()
+    return pos
 
 # starting board
 def starting_board():
-    return [
-        list("rnbqkbnr"),
-        list("pppppppp"),
-        list("........"),
-        list("........"),
-        list("........"),
-        list("........"),
-        list("PPPPPPPP"),
-        list("RNBQKBNR"),
-    ]
-
-def show_board(board):
+    return board_from_rows([
+        "rnbqkbnr",
+        "pppppppp",
+        "........",
+        "........",
+        "........",
+        "........",
+        "PPPPPPPP",
+        "RNBQKBNR",
+    ])
+
+def piece_at(pos, sq):
+    """Piece index on square sq (row*8+col) or EMPTY"""
+    return pos.squares[sq]
+
+def piece_char(p):
+    return '.' if p == EMPTY else PIECE_CHARS[p]
+
+def show_board(pos):
     print("\n   a b c d e f g h")
     for r in range(8):
-        print(f"{8 - r}  {' '.join(board[r])}  {8 - r}")
+        row = [piece_char(piece_at(pos, r * 8 + c)) for c in range(8)]
+        print(f"{8 - r}  {' '.join(row)}  {8 - r}")
     print("   a b c d e f g h\n")
 
 def in_bounds(r, c):
+    # only needed while building the attack tables; bitboards have no off-board squares
     return 0 <= r < 8 and 0 <= c < 8
 
 def square_to_index(sq):
@@ -52,416 +140,672 @@ def square_to_index(sq):
     row = 8 - int(sq[1])
     return row, col
 
+def square_to_bit(sq):
+    """sq like 'e4' -> bit index 0..63 (row*8+col)"""
+    r, c = square_to_index(sq)
+    return r * 8 + c
+
 def index_to_square(r, c):
     return chr(c + ord('a')) + str(8 - r)
 
 # -------------------------
-# Move generation & legality
+# Attack tables (built once at import)
 # -------------------------
-def clear_path(board, r1, c1, r2, c2):
-    dr = 0 if r2 == r1 else (1 if r2 > r1 else -1)
-    dc = 0 if c2 == c1 else (1 if c2 > c1 else -1)
-    steps = max(abs(r2 - r1), abs(c2 - c1))
-    for i in range(1, steps):
-        if board[r1 + dr * i][c1 + dc * i] != '.':
-            return False
-    return True
-
-def is_pseudo_legal(board, r1, c1, r2, c2):
-    """Does not check king-safety. Only geometry and captures"""
-    if not (in_bounds(r1, c1) and in_bounds(r2, c2)):
-        return False
-    piece = board[r1][c1]
-    if piece == '.': return False
-    target = board[r2][c2]
-    # can't capture own piece
-    if target != '.' and (target.isupper() == piece.isupper()):
-        return False
-    dr = r2 - r1
-    dc = c2 - c1
-    pu = piece.upper()
-
-    if pu == 'P':
-        color_white = piece.isupper()
-        direction = -1 if color_white else 1
-        start_row = 6 if color_white else 1
-        # forward
-        if dc == 0:
-            if dr == direction and target == '.':
-                return True
-            if r1 == start_row and dr == 2*direction and board[r1+direction][c1] == '.' and target == '.':
-                return True
-            return False
-        # capture
-        if abs(dc) == 1 and dr == direction and target != '.':
-            return True
-        return False
-
-    if pu == 'N':
-        return (abs(dr), abs(dc)) in [(1,2),(2,1)]
-
-    if pu == 'B':
-        if abs(dr) != abs(dc): return False
-        return clear_path(board, r1, c1, r2, c2)
-
-    if pu == 'R':
-        if dr != 0 and dc != 0: return False
-        return clear_path(board, r1, c1, r2, c2)
-
-    if pu == 'Q':
-        if abs(dr)==abs(dc) or dr==0 or dc==0:
-            return clear_path(board, r1, c1, r2, c2)
-        return False
-
-    if pu == 'K':
-        return max(abs(dr), abs(dc)) == 1
-
-    return False
+def _build_step_table(offsets):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        mask = 0
+        for dr, dc in offsets:
+            if in_bounds(r + dr, c + dc):
+                mask |= 1 << ((r + dr) * 8 + c + dc)
+        table.append(mask)
+    return table
+
+KNIGHT_ATTACKS = _build_step_table([(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)])
+KING_ATTACKS = _build_step_table([(1,0),(-1,0),(0,1),(0,-1),(1,1),(1,-1),(-1,1),(-1,-1)])
+# squares attacked BY a pawn standing on sq (white pawns move towards row 0)
+W_PAWN_ATT = _build_step_table([(-1,-1),(-1,1)])
+B_PAWN_ATT = _build_step_table([(1,-1),(1,1)])
+
+# file/rank masks for set-wise pawn shifts (white pushes go to lower square indices)
+FILE_A = sum(1 << (r * 8) for r in range(8))
+FILE_H = FILE_A << 7
+RANK_4 = 0xFF << 32  # row 4: white double-push landing rank
+RANK_5 = 0xFF << 24  # row 3: black double-push landing rank
+
+# sliding rays: RAYS[d][sq] = every square from sq (exclusive) to the edge in DIRECTIONS[d].
+# Directions 0..3 step to higher square indices, 4..7 to lower ones, so the first blocker
+# on a ray is its lowest set bit for d < 4 and its highest set bit otherwise.
+DIRECTIONS = [(1,0),(0,1),(1,1),(1,-1),(-1,0),(0,-1),(-1,-1),(-1,1)]
+ROOK_DIRS = (0, 1, 4, 5)
+BISHOP_DIRS = (2, 3, 6, 7)
+
+def _build_rays(dr, dc):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        mask = 0
+        r += dr; c += dc
+        while in_bounds(r, c):
+            mask |= 1 << (r * 8 + c)
+            r += dr; c += dc
+        table.append(mask)
+    return table
+
+RAYS = [_build_rays(dr, dc) for dr, dc in DIRECTIONS]
+
+def slider_attacks(sq, occ, dirs):
+    """Squares reached from sq along dirs, stopping at (and including) the first blocker"""
+    attacks = 0
+    for d in dirs:
+        ray = RAYS[d][sq]
+        blockers = ray & occ
+        if blockers:
+            if d < 4:
+                first = lsb(blockers)
+            else:
+                first = msb(blockers)
+            ray ^= RAYS[d][first]
+        attacks |= ray
+    return attacks
+
+def rook_attacks(sq, occ):
+    return slider_attacks(sq, occ, ROOK_DIRS)
+
+def bishop_attacks(sq, occ):
+    return slider_attacks(sq, occ, BISHOP_DIRS)
+
+def queen_attacks(sq, occ):
+    return slider_attacks(sq, occ, ROOK_DIRS + BISHOP_DIRS)
+
+def _build_between():
+    between = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for d in range(8):
+            ray = RAYS[d][a]
+            rest = ray
+            while rest:
+                b = lsb(rest)
+                rest &= rest - 1
+                between[a][b] = ray & ~RAYS[d][b] & ~(1 << b)
+    return between
+
+# BETWEEN[a][b]: squares strictly between a and b when they share a rank/file/diagonal, else 0
+BETWEEN = _build_between()
 
-def square_is_attacked(board, row, col, attacker_is_white):
+# -------------------------
+# Move generation & legality
+# -------------------------
+def square_is_attacked(pos, sq, attacker_is_white):
     """
-    Is square (row,col) attacked by side (attacker_is_white True => white)?
+    Is square sq (row*8+col) attacked by side (attacker_is_white True => white)?
     We'll test pawn, knight, king, and sliding attackers.
     """
-    # pawn attacks
+    bb = pos.bb
     if attacker_is_white:
-        # white pawns attack to north-west and north-east (i.e. row-1, col+-1)
-        for dc in (-1, 1):
-            r = row + 1  # since white pawns move up visually? Note: row 0 is rank8. For our coords white pawns move -1.
-        # Correction: our indexing: row 0 is rank8. White pawns move from rank2 (row6) -> rank3 (row5) -> smaller row.
-        # So white pawn attack squares are (row+1?) No — compute directly:
-    # Simpler approach: check all attacker squares for knights/sliders/king/pawns by scanning offsets.
-
-    # Knights
-    knight_offsets = [(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)]
-    for dr, dc in knight_offsets:
-        r = row + dr
-        c = col + dc
-        if in_bounds(r,c):
-            p = board[r][c]
-            if p != '.':
-                if attacker_is_white and p == 'N': return True
-                if not attacker_is_white and p == 'n': return True
-
-    # King (adjacent)
-    for dr in (-1,0,1):
-        for dc in (-1,0,1):
-            if dr==0 and dc==0: continue
-            r = row + dr; c = col + dc
-            if in_bounds(r,c):
-                p = board[r][c]
-                if p != '.':
-                    if attacker_is_white and p == 'K': return True
-                    if not attacker_is_white and p == 'k': return True
-
-    # Pawn attacks: if attacker is white, white pawns (P) attack to row-1 relative (since white moves 'up' decreasing row)
-    if attacker_is_white:
-        for dc in (-1, 1):
-            r = row + 1  # incoming pawn would be below target (since pawn moves up => r_from = r+1)
-            c = col + dc
-            if in_bounds(r,c) and board[r][c] == 'P': return True
+        # a white pawn attacks sq from the squares a black pawn on sq would attack
+        if KNIGHT_ATTACKS[sq] & bb[WN] or KING_ATTACKS[sq] & bb[WK] or B_PAWN_ATT[sq] & bb[WP]:
+            return True
     else:
-        for dc in (-1, 1):
-            r = row - 1
-            c = col + dc
-            if in_bounds(r,c) and board[r][c] == 'p': return True
-
-    # Sliding pieces: rook/queen on orthogonals
-    directions = [(1,0),(-1,0),(0,1),(0,-1)]
-    for dr, dc in directions:
-        r, c = row+dr, col+dc
-        while in_bounds(r,c):
-            p = board[r][c]
-            if p != '.':
-                if attacker_is_white:
-                    if p in ('R','Q'): return True
-                else:
-                    if p in ('r','q'): return True
-                break
-            r += dr; c += dc
+        if KNIGHT_ATTACKS[sq] & bb[BN] or KING_ATTACKS[sq] & bb[BK] or W_PAWN_ATT[sq] & bb[BP]:
+            return True
 
-    # Diagonals: bishop/queen
-    directions = [(1,1),(1,-1),(-1,1),(-1,-1)]
-    for dr, dc in directions:
-        r, c = row+dr, col+dc
-        while in_bounds(r,c):
-            p = board[r][c]
-            if p != '.':
-                if attacker_is_white:
-                    if p in ('B','Q'): return True
-                else:
-                    if p in ('b','q'): return True
-                break
-            r += dr; c += dc
+    occ = pos.occ_all
+    # Sliding pieces: rook/queen on orthogonals, bishop/queen on diagonals
+    if attacker_is_white:
+        rooks = bb[WR] | bb[WQ]
+        bishops = bb[WB] | bb[WQ]
+    else:
+        rooks = bb[BR] | bb[BQ]
+        bishops = bb[BB] | bb[BQ]
+    if rooks and rook_attacks(sq, occ) & rooks:
+        return True
+    if bishops and bishop_attacks(sq, occ) & bishops:
+        return True
 
     return False
 
-def find_king(board, white_king=True):
-    target = 'K' if white_king else 'k'
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == target:
-                return r, c
-    return None
-
-def is_in_check(board, white_king_side):
-    king_pos = find_king(board, white_king_side)
-    if not king_pos:
+def attackers_to(pos, sq, occ, by_white):
+    """Bitboard of by_white's pieces attacking sq, with sliders blocked by occ"""
+    bb = pos.bb
+    if by_white:
+        return ((KNIGHT_ATTACKS[sq] & bb[WN]) | (KING_ATTACKS[sq] & bb[WK])
+                | (B_PAWN_ATT[sq] & bb[WP])
+                | (rook_attacks(sq, occ) & (bb[WR] | bb[WQ]))
+                | (bishop_attacks(sq, occ) & (bb[WB] | bb[WQ])))
+    return ((KNIGHT_ATTACKS[sq] & bb[BN]) | (KING_ATTACKS[sq] & bb[BK])
+            | (W_PAWN_ATT[sq] & bb[BP])
+            | (rook_attacks(sq, occ) & (bb[BR] | bb[BQ]))
+            | (bishop_attacks(sq, occ) & (bb[BB] | bb[BQ])))
+
+def is_in_check(pos, white_king_side):
+    kings = pos.bb[WK if white_king_side else BK]
+    if not kings:
         return False
-    kr, kc = king_pos
     # If white_king_side True, attackers are black
-    return square_is_attacked(board, kr, kc, attacker_is_white=not white_king_side)
+    return square_is_attacked(pos, msb(kings), attacker_is_white=not white_king_side)
 
-def generate_all_moves(board, white_to_move):
-    """Generate pseudo-legal moves (tuples r1,c1,r2,c2) for side to move."""
-    moves = []
-    for r in range(8):
-        for c in range(8):
-            p = board[r][c]
-            if p == '.': continue
-            if white_to_move and not p.isupper(): continue
-            if not white_to_move and not p.islower(): continue
-            for r2 in range(8):
-                for c2 in range(8):
-                    if is_pseudo_legal(board, r, c, r2, c2):
-                        moves.append((r,c,r2,c2))
-    return moves
-
-def generate_legal_moves(board, white_to_move):
-    """Filter moves that leave own king not in check."""
-    moves = []
-    for m in generate_all_moves(board, white_to_move):
-        r1,c1,r2,c2 = m
-        captured = board[r2][c2]
-        # make
-        board[r2][c2] = board[r1][c1]
-        board[r1][c1] = '.'
-        incheck = is_in_check(board, white_to_move)
-        # undo
-        board[r1][c1] = board[r2][c2]
-        board[r2][c2] = captured
-        if not incheck:
-            moves.append(m)
-    return moves
+# Preallocated move buffers, one per search ply, so nodes don't allocate move lists.
+# 256 bounds the number of moves in any chess position.
+MAX_PLY = 64
+MAX_MOVES = 256
+MOVE_STACK = [[0] * MAX_MOVES for _ in range(MAX_PLY)]
+SCORE_STACK = [[0] * MAX_MOVES for _ in range(MAX_PLY)]
+PSEUDO_BUF = [0] * MAX_MOVES  # scratch for generate_legal_moves_into, consumed immediately
+
+def generate_all_moves(pos, white_to_move, buf, captures_only=False):
+    """
+    Write pseudo-legal moves for side to move (only captures if captures_only) into buf,
+    return how many. Moves are packed ints (see encode_move); captured is EMPTY for quiet moves.
+    """
+    n = 0
+    squares = pos.squares
+    own = pos.occ_w if white_to_move else pos.occ_b
+    enemy = pos.occ_b if white_to_move else pos.occ_w
+    targets_all = enemy if captures_only else FULL_BB & ~own
+    occ = pos.occ_all
+    base = 0 if white_to_move else 6
+    knight_att = KNIGHT_ATTACKS
+    king_att = KING_ATTACKS
+
+    # pawns: all pushes and captures of one kind come from a single shift of the pawn set;
+    # each target set is paired with the from = to + delta that produced it
+    pawns = pos.bb[base]
+    empty = FULL_BB & ~occ
+    if white_to_move:
+        single = (pawns >> 8) & empty
+        pawn_sets = [((pawns >> 9) & ~FILE_H & enemy, 9), ((pawns >> 7) & ~FILE_A & enemy, 7)]
+        if not captures_only:
+            pawn_sets += [(single, 8), ((single >> 8) & empty & RANK_4, 16)]
+    else:
+        single = (pawns << 8) & empty
+        pawn_sets = [((pawns << 9) & ~FILE_A & enemy, -9), ((pawns << 7) & ~FILE_H & enemy, -7)]
+        if not captures_only:
+            pawn_sets += [(single, -8), ((single << 8) & empty & RANK_5, -16)]
+    for targets, delta in pawn_sets:
+        while targets:
+            sq2 = lsb(targets)
+            targets &= targets - 1
+            captured = squares[sq2]  # EMPTY for pushes
+            buf[n] = (sq2 + delta) | (sq2 << 6) | (base << 12) | (captured << 16)
+            n += 1
+
+    for p in range(base + 1, base + 6):
+        pieces = pos.bb[p]
+        kind = p - base
+        while pieces:
+            sq = lsb(pieces)
+            pieces &= pieces - 1
+            if kind == WN:
+                targets = knight_att[sq] & targets_all
+            elif kind == WB:
+                targets = bishop_attacks(sq, occ) & targets_all
+            elif kind == WR:
+                targets = rook_attacks(sq, occ) & targets_all
+            elif kind == WQ:
+                targets = queen_attacks(sq, occ) & targets_all
+            else:
+                targets = king_att[sq] & targets_all
+            while targets:
+                sq2 = lsb(targets)
+                targets &= targets - 1
+                captured = squares[sq2]  # own squares are never targets
+                buf[n] = sq | (sq2 << 6) | (p << 12) | (captured << 16)
+                n += 1
+    return n
+
+def generate_legal_moves(pos, white_to_move, captures_only=False):
+    """List of legal moves, for callers outside the search."""
+    buf = [0] * MAX_MOVES
+    n = generate_legal_moves_into(pos, white_to_move, buf, captures_only)
+    return buf[:n]
+
+def generate_legal_moves_into(pos, white_to_move, buf, captures_only=False):
+    """
+    Write the moves that don't leave own king in check into buf, return how many.
+    Nothing is made/unmade: checkers and pinned pieces are computed once from the king square.
+    """
+    pseudo = PSEUDO_BUF
+    n_pseudo = generate_all_moves(pos, white_to_move, pseudo, captures_only)
+    king_piece = WK if white_to_move else BK
+    kings = pos.bb[king_piece]
+    if not kings:
+        buf[:n_pseudo] = pseudo[:n_pseudo]
+        return n_pseudo
+    ksq = msb(kings)
+    occ = pos.occ_all
+    own = pos.occ_w if white_to_move else pos.occ_b
+    bb = pos.bb
+    if white_to_move:
+        enemy_rooks = bb[BR] | bb[BQ]
+        enemy_bishops = bb[BB] | bb[BQ]
+    else:
+        enemy_rooks = bb[WR] | bb[WQ]
+        enemy_bishops = bb[WB] | bb[WQ]
+    checkers = attackers_to(pos, ksq, occ, not white_to_move)
+
+    # pins: an enemy slider lined up with our king with exactly one own piece in between
+    pin_masks = {}
+    snipers = (rook_attacks(ksq, 0) & enemy_rooks) | (bishop_attacks(ksq, 0) & enemy_bishops)
+    while snipers:
+        s = lsb(snipers)
+        snipers &= snipers - 1
+        blockers = BETWEEN[ksq][s] & occ
+        if popcount(blockers) == 1 and blockers & own:
+            pin_masks[msb(blockers)] = BETWEEN[ksq][s] | (1 << s)
+
+    # in check: non-king moves must capture the checker or block its line
+    if checkers:
+        if popcount(checkers) > 1:
+            evasion_mask = 0  # double check: only the king may move
+        else:
+            csq = msb(checkers)
+            evasion_mask = checkers | BETWEEN[ksq][csq]
+    else:
+        evasion_mask = FULL_BB
+
+    occ_no_king = occ ^ (1 << ksq)
+    n = 0
+    for i in range(n_pseudo):
+        m = pseudo[i]
+        frm = m & 63
+        to = (m >> 6) & 63
+        if (m >> 12) & 15 == king_piece:
+            if not attackers_to(pos, to, occ_no_king, not white_to_move):
+                buf[n] = m
+                n += 1
+            continue
+        to_bit = 1 << to
+        if not evasion_mask & to_bit:
+            continue
+        if frm in pin_masks and not pin_masks[frm] & to_bit:
+            continue
+        buf[n] = m
+        n += 1
+    return n
 
 # -------------------------
 # Make / Unmake
 # -------------------------
-def make_move_on_board(board, move):
-    r1,c1,r2,c2 = move
-    captured = board[r2][c2]
-    board[r2][c2] = board[r1][c1]
-    board[r1][c1] = '.'
-    return captured
-
-def undo_move_on_board(board, move, captured):
-    r1,c1,r2,c2 = move
-    board[r1][c1] = board[r2][c2]
-    board[r2][c2] = captured
+def _xor_move(pos, move):
+    """XOR the moving piece (and any captured piece) in/out of its bitboards and the hash."""
+    # accessors inlined: this runs twice per searched node
+    frm = move & 63
+    to = (move >> 6) & 63
+    piece = (move >> 12) & 15
+    captured = (move >> 16) & 15
+    to_bit = 1 << to
+    move_bits = (1 << frm) | to_bit
+    pos.bb[piece] ^= move_bits
+    keys = ZOBRIST[piece]
+    pos.hash ^= keys[frm] ^ keys[to] ^ ZOBRIST_SIDE
+    if piece < 6:
+        pos.occ_w ^= move_bits
+    else:
+        pos.occ_b ^= move_bits
+    if captured != EMPTY:
+        pos.bb[captured] ^= to_bit
+        pos.hash ^= ZOBRIST[captured][to]
+        if captured < 6:
+            pos.occ_w ^= to_bit
+        else:
+            pos.occ_b ^= to_bit
+    pos.occ_all = pos.occ_w | pos.occ_b
+
+def make_move_on_board(pos, move):
+    _xor_move(pos, move)
+    captured = (move >> 16) & 15
+    pos.squares[move & 63] = EMPTY
+    pos.squares[(move >> 6) & 63] = (move >> 12) & 15
+    pos.material -= PIECE_VALUES[captured]
+
+def make_null_move(pos):
+    # passing only changes the side to move
+    pos.hash ^= ZOBRIST_SIDE
+
+def undo_null_move(pos):
+    pos.hash ^= ZOBRIST_SIDE
+
+def undo_move_on_board(pos, move):
+    # XOR is its own inverse: replaying the same masks restores the bitboards
+    _xor_move(pos, move)
+    captured = (move >> 16) & 15
+    pos.squares[move & 63] = (move >> 12) & 15
+    pos.squares[(move >> 6) & 63] = captured
+    pos.material += PIECE_VALUES[captured]
 
 # -------------------------
 # Evaluation
 # -------------------------
-def evaluate(board):
-    score = 0
-    for r in range(8):
-        for c in range(8):
-            p = board[r][c]
-            if p == '.': continue
-            v = PIECE_VALUES[p.upper()]
-            score += v if p.isupper() else -v
-    return score
+def evaluate(pos):
+    # material is maintained incrementally by make/undo (no promotions yet)
+    return pos.material
 
 # -------------------------
 # Alpha-Beta Search
 # -------------------------
 nodes_searched = 0
 
-def alphabeta(board, depth, alpha, beta, white_to_move):
+# MVV-LVA capture scores indexed [attacker % 6][victim % 6]: most valuable victim first,
+# then least valuable attacker. A legal king capture can't be answered by recapturing
+# the king, so the king attacks as if it were worth nothing.
+MVV_LVA = [[10 * PIECE_VALUES[v] - (0 if a == WK else PIECE_VALUES[a])
+            for v in range(6)] for a in range(6)]
+HINT_SCORE = 1 << 30
+NULL_MOVE_R = 2     # extra depth reduction for the null-move search
+LMR_MIN_MOVES = 3   # moves searched at full depth before late-move reductions kick in
+
+# Transposition table: Position.hash -> (depth, flag, value, best_move)
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+TT_MAX_ENTRIES = 1 << 20
+tt = {}
+
+def ordered_moves(moves, n, scores, hint_move=None):
+    """
+    Yield moves[:n] best-first: hint_move (PV/TT move), then captures by MVV-LVA, then quiets.
+    Selection picks the next best move lazily, so a beta cut-off skips ordering the rest.
+    Reorders moves/scores in place (the ply's buffers).
+    """
+    for i in range(n):
+        m = moves[i]
+        if m == hint_move:
+            scores[i] = HINT_SCORE
+        elif mv_captured(m) == EMPTY:
+            scores[i] = 0
+        else:
+            scores[i] = MVV_LVA[mv_piece(m) % 6][mv_captured(m) % 6]
+    for i in range(n):
+        best = max(range(i, n), key=scores.__getitem__)
+        if best != i:
+            scores[i], scores[best] = scores[best], scores[i]
+            moves[i], moves[best] = moves[best], moves[i]
+        yield moves[i]
+
+def has_non_pawn_material(pos, white):
+    bb = pos.bb
+    if white:
+        return bool(bb[WN] | bb[WB] | bb[WR] | bb[WQ])
+    return bool(bb[BN] | bb[BB] | bb[BR] | bb[BQ])
+
+def alphabeta(pos, depth, alpha, beta, white_to_move, ply=0, allow_null=True):
     global nodes_searched
-    nodes_searched += 1
     if depth == 0:
-        return evaluate(board), None
-    moves = generate_legal_moves(board, white_to_move)
-    if not moves:
+        return qsearch(pos, alpha, beta, white_to_move, ply), None
+    if ply >= MAX_PLY:
+        return evaluate(pos), None
+    nodes_searched += 1
+    alpha_orig, beta_orig = alpha, beta
+    hint_move = None
+    entry = tt.get(pos.hash)
+    if entry is not None:
+        tt_depth, flag, tt_val, hint_move = entry
+        if tt_depth >= depth:
+            if flag == TT_EXACT:
+                return tt_val, hint_move
+            if flag == TT_LOWER:
+                alpha = max(alpha, tt_val)
+            else:
+                beta = min(beta, tt_val)
+            if alpha >= beta:
+                return tt_val, hint_move
+    in_check = is_in_check(pos, white_to_move)
+
+    # Null move: hand the opponent a free move. If a reduced null-window search still
+    # fails high (low for black) we'd fail high anyway. Skipped in check and in pawn
+    # endings, where passing can be better than any move (zugzwang).
+    if (allow_null and ply > 0 and depth >= 3 and not in_check
+            and has_non_pawn_material(pos, white_to_move)):
+        make_null_move(pos)
+        if white_to_move:
+            val, _ = alphabeta(pos, depth-1-NULL_MOVE_R, beta-1, beta, False, ply+1, False)
+        else:
+            val, _ = alphabeta(pos, depth-1-NULL_MOVE_R, alpha, alpha+1, True, ply+1, False)
+        undo_null_move(pos)
+        if white_to_move and val >= beta:
+            return beta, None
+        if not white_to_move and val <= alpha:
+            return alpha, None
+
+    moves = MOVE_STACK[ply]
+    n = generate_legal_moves_into(pos, white_to_move, moves)
+    if not n:
         # no legal moves: either checkmate or stalemate
-        if is_in_check(board, white_to_move):
+        if in_check:
             # mate score: large negative for side to move
             return (-999999 if white_to_move else 999999), None
         else:
             return 0, None  # stalemate
     best_move = None
-    # Simple move ordering: captures first
-    moves.sort(key=lambda m: 0 if board[m[2]][m[3]] == '.' else 1, reverse=True)
     if white_to_move:
         value = -math.inf
-        for m in moves:
-            captured = make_move_on_board(board, m)
-            val, _ = alphabeta(board, depth-1, alpha, beta, False)
-            undo_move_on_board(board, m, captured)
+        for i, m in enumerate(ordered_moves(moves, n, SCORE_STACK[ply], hint_move)):
+            make_move_on_board(pos, m)
+            if (i >= LMR_MIN_MOVES and depth >= 3 and not in_check
+                    and mv_captured(m) == EMPTY and not is_in_check(pos, False)):
+                # late quiet move: prove it can't beat alpha with a reduced null window
+                val, _ = alphabeta(pos, depth-2, alpha, alpha+1, False, ply+1)
+                if val > alpha:
+                    val, _ = alphabeta(pos, depth-1, alpha, beta, False, ply+1)
+            else:
+                val, _ = alphabeta(pos, depth-1, alpha, beta, False, ply+1)
+            undo_move_on_board(pos, m)
             if val > value:
                 value = val
                 best_move = m
             alpha = max(alpha, value)
             if alpha >= beta:
                 break
-        return value, best_move
     else:
         value = math.inf
-        for m in moves:
-            captured = make_move_on_board(board, m)
-            val, _ = alphabeta(board, depth-1, alpha, beta, True)
-            undo_move_on_board(board, m, captured)
+        for i, m in enumerate(ordered_moves(moves, n, SCORE_STACK[ply], hint_move)):
+            make_move_on_board(pos, m)
+            if (i >= LMR_MIN_MOVES and depth >= 3 and not in_check
+                    and mv_captured(m) == EMPTY and not is_in_check(pos, True)):
+                val, _ = alphabeta(pos, depth-2, beta-1, beta, True, ply+1)
+                if val < beta:
+                    val, _ = alphabeta(pos, depth-1, alpha, beta, True, ply+1)
+            else:
+                val, _ = alphabeta(pos, depth-1, alpha, beta, True, ply+1)
+            undo_move_on_board(pos, m)
             if val < value:
                 value = val
                 best_move = m
             beta = min(beta, value)
             if alpha >= beta:
                 break
-        return value, best_move
+    if value <= alpha_orig:
+        flag = TT_UPPER
+    elif value >= beta_orig:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    if len(tt) >= TT_MAX_ENTRIES:
+        tt.clear()
+    tt[pos.hash] = (depth, flag, value, best_move)
+    return value, best_move
+
+def qsearch(pos, alpha, beta, white_to_move, ply):
+    """
+    Capture-only search below the horizon so leaves are never scored mid-exchange.
+    The side to move may stand pat on the static evaluation instead of capturing.
+    """
+    global nodes_searched
+    nodes_searched += 1
+    value = evaluate(pos)
+    if white_to_move:
+        if value >= beta:
+            return value
+        alpha = max(alpha, value)
+    else:
+        if value <= alpha:
+            return value
+        beta = min(beta, value)
+    if ply >= MAX_PLY:
+        return value
+    moves = MOVE_STACK[ply]
+    n = generate_legal_moves_into(pos, white_to_move, moves, captures_only=True)
+    for m in ordered_moves(moves, n, SCORE_STACK[ply]):
+        make_move_on_board(pos, m)
+        val = qsearch(pos, alpha, beta, not white_to_move, ply+1)
+        undo_move_on_board(pos, m)
+        if white_to_move:
+            if val > value:
+                value = val
+            alpha = max(alpha, value)
+        else:
+            if val < value:
+                value = val
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return value
+
+def search(pos, depth, white_to_move):
+    """Iterative deepening: each iteration seeds the next through the TT best moves."""
+    val, best = 0, None
+    for d in range(1, depth + 1):
+        val, best = alphabeta(pos, d, -9999999, 9999999, white_to_move)
+    return val, best
 
 # -------------------------
 # Move parsing (algebraic + coords) with case-sensitivity rules
 # -------------------------
-def parse_user_move(board, move_str, white_to_move):
+def parse_user_move(pos, move_str, white_to_move):
     """
     Accepts:
       - coordinate style: e2e4
       - algebraic: e4, exd5, Nf3, Bxd3, nf6 (lowercase piece letter -> black piece),
         'O-O', 'O-O-O' (not fully verified; basic).
-    Returns a move tuple (r1,c1,r2,c2) or None if not found/illegal.
+    Returns a packed move (see encode_move) or None if not found/illegal.
     """
     s = move_str.strip()
+    legal = generate_legal_moves(pos, white_to_move)
+    # SAN first, compared without 'x', '+' and '#'. Black's piece letters are lowercase,
+    # and when that collides with a b-pawn move (bxc6 vs a bishop to c6) the pawn wins.
+    san_map = {}
+    for m in legal:
+        san = move_to_san(pos, m, legal).replace('x', '')
+        if not white_to_move and san[0] in "NBRQK":
+            san = san[0].lower() + san[1:]
+        if san not in san_map or mv_piece(m) % 6 == WP:
+            san_map[san] = m
+    mv = san_map.get(s.replace('x', '').replace('+', '').replace('#', ''))
+    if mv is not None:
+        return mv
     # coordinates: e2e4
-    if len(s) == 4 and s[0] in "abcdefgh" and s[2] in "abcdefgh":
-        try:
-            r1,c1 = square_to_index(s[:2])
-            r2,c2 = square_to_index(s[2:])
-            # quick validation of side-to-move ownership will be checked later
-            if is_pseudo_legal(board, r1,c1,r2,c2):
-                return (r1,c1,r2,c2)
-            else:
-                return None
-        except:
-            return None
+    if (len(s) == 4 and s[0] in "abcdefgh" and s[1] in "12345678"
+            and s[2] in "abcdefgh" and s[3] in "12345678"):
+        frm = square_to_bit(s[:2])
+        to = square_to_bit(s[2:])
+        for m in legal:
+            if mv_from(m) == frm and mv_to(m) == to:
+                return m
+        return None
     # castling (rudimentary)
+    occ = pos.occ_all
+    def empty(r, c):
+        return not occ >> (r * 8 + c) & 1
+    def has(p, r, c):
+        return pos.bb[p] >> (r * 8 + c) & 1
     if s in ("O-O","o-o","0-0"):
         if white_to_move:
             # white kingside
-            if board[7][4]=='K' and board[7][7]=='R' and board[7][5]=='.' and board[7][6]=='.':
-                return (7,4,7,6)
+            if has(WK,7,4) and has(WR,7,7) and empty(7,5) and empty(7,6):
+                return encode_move(60, 62, WK, EMPTY)
         else:
-            if board[0][4]=='k' and board[0][7]=='r' and board[0][5]=='.' and board[0][6]=='.':
-                return (0,4,0,6)
+            if has(BK,0,4) and has(BR,0,7) and empty(0,5) and empty(0,6):
+                return encode_move(4, 6, BK, EMPTY)
         return None
     if s in ("O-O-O","o-o-o","0-0-0"):
         if white_to_move:
-            if board[7][4]=='K' and board[7][0]=='R' and board[7][1]=='.' and board[7][2]=='.' and board[7][3]=='.':
-                return (7,4,7,2)
+            if has(WK,7,4) and has(WR,7,0) and empty(7,1) and empty(7,2) and empty(7,3):
+                return encode_move(60, 58, WK, EMPTY)
         else:
-            if board[0][4]=='k' and board[0][0]=='r' and board[0][1]=='.' and board[0][2]=='.' and board[0][3]=='.':
-                return (0,4,0,2)
+            if has(BK,0,4) and has(BR,0,0) and empty(0,1) and empty(0,2) and empty(0,3):
+                return encode_move(4, 2, BK, EMPTY)
         return None
 
     # Algebraic: detect piece-letter (if present)
     # According to your rule: uppercase piece-letter => white piece; lowercase => black piece
-    piece_letter = None
-    desired_color_white = white_to_move
-    # if first char is a letter in NBRQK or lowercase variants, that indicates piece and color
     if s and s[0] in "NBRQKnbrqk":
+        if s[0].isupper() != white_to_move:
+            # user explicitly asked upper/lower piece for opposite color — reject
+            return None
         piece_letter = s[0].upper()
-        desired_color_white = s[0].isupper()
         s_body = s[1:]
     else:
-        piece_letter = 'P'  # pawn
-        desired_color_white = white_to_move
+        piece_letter = ''  # pawn
         s_body = s
 
     # strip capture marker and other markers like '+' or '#'
-    s_body = s_body.replace('x','')
-    s_body = s_body.replace('+','').replace('#','')
+    s_body = s_body.replace('x','').replace('+','').replace('#','')
 
-    # destination is last two chars
-    if len(s_body) < 2:
-        return None
+    # not an exact SAN: over- or under-specified disambiguation (Nbd2 when unambiguous, Nd2 when not)
     dest = s_body[-2:]
-    try:
-        r2,c2 = square_to_index(dest)
-    except:
+    if len(dest) < 2 or dest[0] not in "abcdefgh" or dest[1] not in "12345678":
         return None
-
-    # find candidate pieces of that type and color that can move to dest
+    to = square_to_bit(dest)
+    wanted = CHAR_TO_PIECE[(piece_letter or 'P') if white_to_move else (piece_letter or 'P').lower()]
+    disamb = s_body[:-2]
     candidates = []
-    for r in range(8):
-        for c in range(8):
-            p = board[r][c]
-            if p == '.': continue
-            if desired_color_white and not p.isupper(): continue
-            if not desired_color_white and not p.islower(): continue
-            if p.upper() != piece_letter: continue
-            if is_pseudo_legal(board, r, c, r2, c2):
-                # later we'll ensure king safety in generate_legal_moves; here we collect pseudo-legal
-                candidates.append((r,c))
-
-    if not candidates:
-        return None
-
-    # If there's disambiguation characters in s_body (like Nbd2 or R1e1), try to use them
-    disamb = s_body[:-2]  # portion before destination (already had 'x' removed)
-    if disamb:
-        filtered = []
-        for (r,c) in candidates:
-            filec = chr(c + ord('a'))
-            rankc = str(8 - r)
-            if disamb in (filec, rankc, filec+rankc):
-                filtered.append((r,c))
-        if filtered:
-            candidates = filtered
-
+    for m in legal:
+        if mv_piece(m) != wanted or mv_to(m) != to:
+            continue
+        r, c = divmod(mv_from(m), 8)
+        filec = chr(c + ord('a'))
+        rankc = str(8 - r)
+        if not disamb or disamb in (filec, rankc, filec+rankc):
+            candidates.append(m)
     # if multiple still, pick the first (phase 1.5 simplification)
-    r1,c1 = candidates[0]
-    # final check: side to move must match white_to_move
-    if desired_color_white != white_to_move:
-        # user explicitly asked upper/lower piece for opposite color — reject
-        return None
-    # return move tuple, but only if it's legal w.r.t king safety
-    captured = board[r2][c2]
-    board[r2][c2] = board[r1][c1]
-    board[r1][c1] = '.'
-    illegal = is_in_check(board, white_to_move)  # if our king is in check after move, illegal
-    # undo
-    board[r1][c1] = board[r2][c2]
-    board[r2][c2] = captured
-    if illegal:
-        return None
-    return (r1,c1,r2,c2)
+    return candidates[0] if candidates else None
 
 # -------------------------
 # SAN-ish formatting for display
 # -------------------------
-def move_to_san(board, move):
-    r1,c1,r2,c2 = move
-    piece = board[r1][c1]
-    dest_piece = board[r2][c2]
-    piece_letter = '' if piece.upper() == 'P' else piece.upper()
-    capture = 'x' if dest_piece != '.' else ''
-    if piece.upper() == 'P' and capture:
-        return f"{chr(c1+ord('a'))}{capture}{index_to_square(r2,c2)}"
-    else:
-        return f"{piece_letter}{capture}{index_to_square(r2,c2)}"
+def move_to_san(pos, move, legal=None):
+    """
+    SAN without check markers. `legal` (the side to move's legal moves) is used to
+    disambiguate pieces; it is generated when not supplied.
+    """
+    frm, to, piece, captured = mv_from(move), mv_to(move), mv_piece(move), mv_captured(move)
+    dest = index_to_square(*divmod(to, 8))
+    is_pawn = piece % 6 == WP
+    piece_letter = '' if is_pawn else PIECE_CHARS[piece % 6]
+    capture = 'x' if captured != EMPTY else ''
+    if is_pawn and capture:
+        return f"{chr(frm % 8 + ord('a'))}{capture}{dest}"
+    disamb = ''
+    if not is_pawn:
+        if legal is None:
+            legal = generate_legal_moves(pos, piece < 6)
+        rivals = [mv_from(m) for m in legal
+                  if mv_piece(m) == piece and mv_to(m) == to and mv_from(m) != frm]
+        if rivals:
+            filec = chr(frm % 8 + ord('a'))
+            rankc = str(8 - frm // 8)
+            if all(r % 8 != frm % 8 for r in rivals):
+                disamb = filec
+            elif all(r // 8 != frm // 8 for r in rivals):
+                disamb = rankc
+            else:
+                disamb = filec + rankc
+    return f"{piece_letter}{disamb}{capture}{dest}"
 
 # -------------------------
 # Perft
 # -------------------------
-def perft(board, depth, white_to_move):
+def perft(pos, depth, white_to_move, ply=0):
     if depth == 0:
         return 1
     nodes = 0
-    moves = generate_legal_moves(board, white_to_move)
-    for m in moves:
-        captured = make_move_on_board(board, m)
-        nodes += perft(board, depth-1, not white_to_move)
-        undo_move_on_board(board, m, captured)
+    moves = MOVE_STACK[ply]
+    n = generate_legal_moves_into(pos, white_to_move, moves)
+    for i in range(n):
+        m = moves[i]
+        make_move_on_board(pos, m)
+        nodes += perft(pos, depth-1, not white_to_move, ply+1)
+        undo_move_on_board(pos, m)
     return nodes
 
 # -------------------------
@@ -495,6 +839,9 @@ def uci_loop():
             except:
                 print("bad depth")
                 continue
+            if d < 1:
+                print("depth must be at least 1")
+                continue
             t0 = time.time()
             nodes = perft(board, d, white_to_move)
             t1 = time.time()
@@ -506,15 +853,18 @@ def uci_loop():
             except:
                 print("bad depth")
                 continue
+            if d < 1:
+                print("depth must be at least 1")
+                continue
             nodes_searched = 0
             t0 = time.time()
-            val, best = alphabeta(board, d, -9999999, 9999999, white_to_move)
+            val, best = search(board, d, white_to_move)
             t1 = time.time()
             if best is None:
                 print("No legal moves available.")
             else:
                 san = move_to_san(board, best)
-                captured = make_move_on_board(board, best)
+                make_move_on_board(board, best)
                 print(f"Engine plays: {san}  (eval {val/100:.2f}) nodes {nodes_searched} time {t1-t0:.3f}s")
                 # no auto-promotion handling
                 white_to_move = not white_to_move
@@ -526,30 +876,7 @@ def uci_loop():
         if mv is None:
             print("Illegal or ambiguous move.")
             continue
-        r1,c1,r2,c2 = mv
-        # final safety check: ensure piece color matches turn
-        piece = board[r1][c1]
-        if piece == '.':
-            print("No piece on source.")
-            continue
-        if white_to_move and not piece.isupper():
-            print("Illegal: it's White's turn.")
-            continue
-        if not white_to_move and not piece.islower():
-            print("Illegal: it's Black's turn.")
-            continue
-        captured = make_move_on_board(board, mv)
-        # if this leaves own king in check, undo
-        if is_in_check(board, not white_to_move):  # after move, check the player who just moved? better check opponent attacking?
-            # Actually we must check whether the side that just moved left themselves in check:
-            # Since we updated board already, the side that moved is the opposite of white_to_move
-            # We want to ensure their own king is not in check; that is is_in_check(board, side_that_just_moved)
-            # side_that_just_moved = not white_to_move
-            if is_in_check(board, not white_to_move):
-                undo_move_on_board(board, mv, captured)
-                print("Illegal move: king would be in check.")
-                continue
-        # Accept move
+        make_move_on_board(board, mv)
         white_to_move = not white_to_move
         show_board(board)
 
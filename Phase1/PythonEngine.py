@@ -1,49 +1,265 @@
+"""
+Phase 1.4 Chess Engine (alpha-beta search, bitboard board)
+
+Standalone predecessor of Phase1.5.py; it shares no code with it. Importing this
+module only defines functions, the interactive loop starts under __main__.
+"""
+
 import time
-import copy
+import random
+from dataclasses import dataclass, field
+
+try:
+    import _engine  # optional C move generator and perft, built by setup.py
+except ImportError:
+    _engine = None
 
 # -----------------------------------------------------
 # Board Setup
 # -----------------------------------------------------
+# Piece codes: bits 0..2 = type, bit 3 = colour (set for black), 0 = empty square
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+BLACK = 8
+PIECE_CHARS = ".PNBRQK..pnbrqk."  # indexed by piece code
+CHAR_TO_CODE = {ch: code for code, ch in enumerate(PIECE_CHARS) if ch != '.'}
+
+# indexed by piece type (code & 7): -, P, N, B, R, Q, K
+piece_values = [0, 1, 3, 3, 5, 9, 0, 0]
+# signed value of every piece code, white positive
+VAL = piece_values + [-v for v in piece_values]
+
+# Square index is row*8+col (row 0 = rank 8, col 0 = file a); bit `sq` of a piece
+# bitboard is set when that piece stands on sq. `squares` mirrors the bitboards as a
+# 64-byte mailbox of piece codes.
+@dataclass
+class Position:
+    wp: int = 0
+    wn: int = 0
+    wb: int = 0
+    wr: int = 0
+    wq: int = 0
+    wk: int = 0
+    bp: int = 0
+    bn: int = 0
+    bb: int = 0
+    br: int = 0
+    bq: int = 0
+    bk: int = 0
+    white_occ: int = 0
+    black_occ: int = 0
+    all_occ: int = 0
+    hash: int = 0  # Zobrist key of the pieces; the side to move is folded in by pvs
+    material: int = 0  # white material minus black material, kept by do_move/undo_move
+    squares: bytearray = field(default_factory=lambda: bytearray(64))
+
+    def update_occupancy(self):
+        self.white_occ = self.wp | self.wn | self.wb | self.wr | self.wq | self.wk
+        self.black_occ = self.bp | self.bn | self.bb | self.br | self.bq | self.bk
+        self.all_occ = self.white_occ | self.black_occ
+
+# bitboard field of each piece code
+PIECE_FIELDS = (
+    None, 'wp', 'wn', 'wb', 'wr', 'wq', 'wk', None,
+    None, 'bp', 'bn', 'bb', 'br', 'bq', 'bk', None,
+)
+
+# Zobrist keys: one per (piece code, square) plus one for black to move
+_zobrist_rng = random.Random(0xC0FFEE)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(64)] for _ in range(16)]
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+def board_from_rows(rows):
+    """rows: 8 strings (rank 8 first) of piece letters and '.' -> Position"""
+    pos = Position()
+    for r, row in enumerate(rows):
+        for c, ch in enumerate(row):
+            if ch != '.':
+                piece = CHAR_TO_CODE[ch]
+                name = PIECE_FIELDS[piece]
+                setattr(pos, name, getattr(pos, name) | 1 << (r * 8 + c))
+                pos.squares[r * 8 + c] = piece
+                pos.hash ^= ZOBRIST[piece][r * 8 + c]
+                pos.material += VAL[piece]
+    pos.update_occupancy()
+    return pos
+
 def starting_board():
-    return [
-        list("rnbqkbnr"),
-        list("pppppppp"),
-        list("........"),
-        list("........"),
-        list("........"),
-        list("........"),
-        list("PPPPPPPP"),
-        list("RNBQKBNR")
-    ]
+    return board_from_rows([
+        "rnbqkbnr",
+        "pppppppp",
+        "........",
+        "........",
+        "........",
+        "........",
+        "PPPPPPPP",
+        "RNBQKBNR",
+    ])
 
 def show(board):
     print("\n   a b c d e f g h")
     for r in range(8):
-        print(f"{8 - r}  {' '.join(board[r])}  {8 - r}")
+        row = ' '.join(PIECE_CHARS[p] for p in board.squares[r * 8:r * 8 + 8])
+        print(f"{8 - r}  {row}  {8 - r}")
     print("   a b c d e f g h\n")
 
 def square_to_index(sq):
     col = ord(sq[0]) - ord('a')
     row = 8 - int(sq[1])
-    return row, col
+    return row * 8 + col
 
-def index_to_square(r, c):
+def index_to_square(sq):
+    r, c = divmod(sq, 8)
     return chr(c + ord('a')) + str(8 - r)
 
+def move_to_str(m):
+    """Coordinate notation, e.g. e2e4 or e7e8q"""
+    from_sq, to_sq, promo = m
+    text = index_to_square(from_sq) + index_to_square(to_sq)
+    if promo:
+        text += PIECE_CHARS[promo & 7].lower()
+    return text
+
+# -----------------------------------------------------
+# Attack Tables
+# -----------------------------------------------------
+def _build_step_table(offsets):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        mask = 0
+        for dr, dc in offsets:
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                mask |= 1 << ((r + dr) * 8 + c + dc)
+        table.append(mask)
+    return table
+
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+BISHOP_DIRS = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+ROOK_DIRS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+KNIGHT_ATTACKS = _build_step_table(KNIGHT_OFFSETS)
+KING_ATTACKS = _build_step_table(KING_OFFSETS)
+PAWN_ATTACKS_W = _build_step_table(((-1, -1), (-1, 1)))
+PAWN_ATTACKS_B = _build_step_table(((1, -1), (1, 1)))
+
+FULL_BB = (1 << 64) - 1
+FILE_A = sum(1 << (r * 8) for r in range(8))
+FILE_H = FILE_A << 7
+ROW_3 = 0xFF << 40  # white pawns land here after one push from their start row
+ROW_6 = 0xFF << 16  # black pawns land here after one push from their start row
+PROMOTION_ROWS = 0xFF | 0xFF << 56
+WHITE_PROMOS = (QUEEN, ROOK, BISHOP, KNIGHT)
+BLACK_PROMOS = tuple(p | BLACK for p in WHITE_PROMOS)
+
+def _build_rays(dr, dc):
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        mask = 0
+        r += dr; c += dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << (r * 8 + c)
+            r += dr; c += dc
+        table.append(mask)
+    return table
+
+# (ray table, ascending) per direction: table[sq] holds every square from sq (exclusive)
+# to the edge. On an ascending ray the first blocker is the lowest set bit, otherwise
+# the highest.
+def _ray_set(dirs):
+    return tuple((_build_rays(dr, dc), dr * 8 + dc > 0) for dr, dc in dirs)
+
+BISHOP_RAYS = _ray_set(BISHOP_DIRS)
+ROOK_RAYS = _ray_set(ROOK_DIRS)
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+
+def slider_attacks(sq, occ, rays):
+    attacks = 0
+    for table, ascending in rays:
+        ray = table[sq]
+        blockers = ray & occ
+        if blockers:
+            if ascending:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+# every square a bishop / rook on sq could reach on an empty board
+BISHOP_LINES = [slider_attacks(sq, 0, BISHOP_RAYS) for sq in range(64)]
+ROOK_LINES = [slider_attacks(sq, 0, ROOK_RAYS) for sq in range(64)]
+QUEEN_LINES = [b | r for b, r in zip(BISHOP_LINES, ROOK_LINES)]
+
+def _build_between():
+    between = [[0] * 64 for _ in range(64)]
+    for table, _ in QUEEN_RAYS:
+        for from_sq in range(64):
+            ray = table[from_sq]
+            rest = ray
+            while rest:
+                to_sq = (rest & -rest).bit_length() - 1
+                rest &= rest - 1
+                between[from_sq][to_sq] = ray & ~table[to_sq] & ~(1 << to_sq)
+    return between
+
+# RAY_BETWEEN[a][b]: squares strictly between a and b when they share a line, else 0
+RAY_BETWEEN = _build_between()
+SLIDER_LINES = {BISHOP: BISHOP_LINES, ROOK: ROOK_LINES, QUEEN: QUEEN_LINES}
+
 # -----------------------------------------------------
 # Move Parsing
 # -----------------------------------------------------
+def _checked_move(board, from_sq, to_sq, promo_type, white_to_move):
+    piece = board.squares[from_sq]
+    if piece == EMPTY or bool(piece & BLACK) == white_to_move:
+        return None
+    if not is_pseudo_legal(board, from_sq, to_sq):
+        return None
+    return _with_promotion(board, from_sq, to_sq, promo_type)
+
+def _with_promotion(board, from_sq, to_sq, promo_type):
+    # a pawn reaching the last row promotes; everything else carries EMPTY
+    piece = board.squares[from_sq]
+    if piece & 7 == PAWN and PROMOTION_ROWS >> to_sq & 1:
+        return from_sq, to_sq, promo_type | (piece & BLACK)
+    return from_sq, to_sq, EMPTY
+
 def parse_move(board, move_str, white_to_move):
+    """
+    Returns (from_sq, to_sq, promo) only for a pseudo-legal move of the side to move,
+    None otherwise, so callers can play the result without checking it again.
+    """
     move_str = move_str.strip()
-    # coordinate notation (e2e4)
-    if len(move_str) == 4 and move_str[0] in "abcdefgh" and move_str[2] in "abcdefgh":
-        return square_to_index(move_str[:2]) + square_to_index(move_str[2:])
+    # promotion piece (e8=Q or e7e8q), queen when not given
+    promo_type = QUEEN
+    if "=" in move_str:
+        move_str, _, letter = move_str.partition("=")
+        if letter.upper() not in ("Q", "R", "B", "N"):
+            return None
+        promo_type = CHAR_TO_CODE[letter.upper()]
+    elif len(move_str) == 5 and move_str[0] in "abcdefgh" and move_str[2] in "abcdefgh" and move_str[4] in "qrbn":
+        promo_type = CHAR_TO_CODE[move_str[4].upper()]
+        move_str = move_str[:4]
+
+    if not move_str:
+        return None
+
+    # coordinate notation (e2e4); anything else, exd5 included, is SAN
+    if (len(move_str) == 4 and move_str[0] in "abcdefgh" and move_str[1] in "12345678"
+            and move_str[2] in "abcdefgh" and move_str[3] in "12345678"):
+        return _checked_move(board, square_to_index(move_str[:2]), square_to_index(move_str[2:]),
+                             promo_type, white_to_move)
 
     # Castling
+    king_sq = 60 if white_to_move else 4
     if move_str in ["O-O", "o-o", "0-0"]:
-        return (7, 4, 7, 6) if white_to_move else (0, 4, 0, 6)
+        return _checked_move(board, king_sq, king_sq + 2, promo_type, white_to_move)
     if move_str in ["O-O-O", "o-o-o", "0-0-0"]:
-        return (7, 4, 7, 2) if white_to_move else (0, 4, 0, 2)
+        return _checked_move(board, king_sq, king_sq - 2, promo_type, white_to_move)
 
     # Determine color and piece
     piece_letter = "P"
@@ -59,186 +275,393 @@ def parse_move(board, move_str, white_to_move):
         piece_letter = "P"
         is_white_piece = white_to_move
 
+    # a piece letter of the other colour is never the side to move's move
+    if is_white_piece != white_to_move:
+        return None
+
     # Destination square (last two)
     dest = move_str[-2:]
-    if dest[0] not in "abcdefgh" or dest[1] not in "12345678":
+    if len(dest) < 2 or dest[0] not in "abcdefgh" or dest[1] not in "12345678":
         return None
-    to_row, to_col = square_to_index(dest)
+    to_sq = square_to_index(dest)
 
-    move_str = move_str.replace("x", "")
+    # what is left before the destination narrows the origin (exd5, Nbd2, R1e2)
+    disamb = move_str.replace("x", "")[:-2]
 
     # Find matching piece
+    piece = CHAR_TO_CODE[piece_letter if is_white_piece else piece_letter.lower()]
+    bb = getattr(board, PIECE_FIELDS[piece])
     candidates = []
-    for r in range(8):
-        for c in range(8):
-            piece = board[r][c]
-            if piece == '.':
-                continue
-            if is_white_piece and piece.isupper() and piece.upper() == piece_letter:
-                if is_pseudo_legal(board, r, c, to_row, to_col):
-                    candidates.append((r, c))
-            if not is_white_piece and piece.islower() and piece.lower() == piece_letter.lower():
-                if is_pseudo_legal(board, r, c, to_row, to_col):
-                    candidates.append((r, c))
+    while bb:
+        sq = (bb & -bb).bit_length() - 1
+        bb &= bb - 1
+        name = index_to_square(sq)
+        if disamb and disamb not in (name[0], name[1], name):
+            continue
+        if is_pseudo_legal(board, sq, to_sq):
+            candidates.append(sq)
     if not candidates:
         return None
-    return (*candidates[0], to_row, to_col)
+    return _with_promotion(board, candidates[0], to_sq, promo_type)
 
 # -----------------------------------------------------
 # Move Legality
 # -----------------------------------------------------
-def is_pseudo_legal(board, r1, c1, r2, c2):
-    piece = board[r1][c1]
-    if piece == '.':
+def piece_targets(board, sq, piece):
+    """Bitboard of pseudo-legal destinations for `piece` standing on sq"""
+    white = not piece & BLACK
+    if white:
+        own, enemy = board.white_occ, board.black_occ
+    else:
+        own, enemy = board.black_occ, board.white_occ
+    p = piece & 7
+    if p == PAWN:
+        empty = ~board.all_occ
+        if white:
+            if sq < 8:
+                return 0
+            targets = (1 << (sq - 8)) & empty
+            if targets and sq >= 48:
+                targets |= (1 << (sq - 16)) & empty
+            return targets | (PAWN_ATTACKS_W[sq] & enemy)
+        if sq >= 56:
+            return 0
+        targets = (1 << (sq + 8)) & empty
+        if targets and sq < 16:
+            targets |= (1 << (sq + 16)) & empty
+        return targets | (PAWN_ATTACKS_B[sq] & enemy)
+    elif p == KNIGHT:
+        targets = KNIGHT_ATTACKS[sq]
+    elif p == BISHOP:
+        targets = slider_attacks(sq, board.all_occ, BISHOP_RAYS)
+    elif p == ROOK:
+        targets = slider_attacks(sq, board.all_occ, ROOK_RAYS)
+    elif p == QUEEN:
+        targets = slider_attacks(sq, board.all_occ, QUEEN_RAYS)
+    else:
+        targets = KING_ATTACKS[sq]
+    return targets & ~own
+
+def is_pseudo_legal(board, from_sq, to_sq):
+    piece = board.squares[from_sq]
+    if piece == EMPTY:
         return False
-    color = piece.isupper()
-    dr, dc = r2 - r1, c2 - c1
-
-    target = board[r2][c2]
-    if target != '.':
-        if target.isupper() == piece.isupper():
-            return False
-
-    p = piece.upper()
-    if p == 'P':
-        direction = -1 if color else 1
-        start_row = 6 if color else 1
-        if dc == 0 and board[r2][c2] == '.':
-            if dr == direction:
-                return True
-            if dr == 2 * direction and r1 == start_row and board[r1 + direction][c1] == '.':
-                return True
-        if abs(dc) == 1 and dr == direction and board[r2][c2] != '.':
-            return True
-    elif p == 'N':
-        return (abs(dr), abs(dc)) in [(1, 2), (2, 1)]
-    elif p == 'B':
-        if abs(dr) != abs(dc): return False
-        return clear_path(board, r1, c1, r2, c2)
-    elif p == 'R':
-        if dr != 0 and dc != 0: return False
-        return clear_path(board, r1, c1, r2, c2)
-    elif p == 'Q':
-        if abs(dr) == abs(dc) or dr == 0 or dc == 0:
-            return clear_path(board, r1, c1, r2, c2)
-    elif p == 'K':
-        return max(abs(dr), abs(dc)) == 1
-    return False
-
-def clear_path(board, r1, c1, r2, c2):
-    dr = (r2 - r1) and ((r2 - r1)//abs(r2 - r1))
-    dc = (c2 - c1) and ((c2 - c1)//abs(c2 - c1))
-    r, c = r1 + dr, c1 + dc
-    while (r, c) != (r2, c2):
-        if board[r][c] != '.':
-            return False
-        r += dr; c += dc
-    return True
+    target = board.squares[to_sq]
+    if target != EMPTY and not (target ^ piece) & BLACK:
+        return False
+    # knight and king moves are a single bit test in the precomputed tables
+    p = piece & 7
+    if p == KNIGHT:
+        return bool(KNIGHT_ATTACKS[from_sq] >> to_sq & 1)
+    if p == KING:
+        return bool(KING_ATTACKS[from_sq] >> to_sq & 1)
+    # a slider needs to share one of its lines with to_sq and an empty stretch between
+    lines = SLIDER_LINES.get(p)
+    if lines is not None:
+        return bool(lines[from_sq] >> to_sq & 1) and not RAY_BETWEEN[from_sq][to_sq] & board.all_occ
+    return bool(piece_targets(board, from_sq, piece) >> to_sq & 1)
 
 # -----------------------------------------------------
 # Move Execution
 # -----------------------------------------------------
+def _xor_move(board, piece, captured, from_sq, to_sq):
+    # XOR is its own inverse, so the same update plays and takes back a move
+    to_bit = 1 << to_sq
+    move_mask = 1 << from_sq | to_bit
+    name = PIECE_FIELDS[piece]
+    setattr(board, name, getattr(board, name) ^ move_mask)
+    keys = ZOBRIST[piece]
+    h = board.hash ^ keys[from_sq] ^ keys[to_sq]
+    if captured == EMPTY:
+        if piece & BLACK:
+            board.black_occ ^= move_mask
+        else:
+            board.white_occ ^= move_mask
+    else:
+        name = PIECE_FIELDS[captured]
+        setattr(board, name, getattr(board, name) ^ to_bit)
+        h ^= ZOBRIST[captured][to_sq]
+        if not piece & BLACK:
+            board.white_occ ^= move_mask
+            board.black_occ ^= to_bit
+        else:
+            board.black_occ ^= move_mask
+            board.white_occ ^= to_bit
+    board.hash = h
+    board.all_occ = board.white_occ | board.black_occ
+
+def _swap_piece(board, old, new, sq):
+    # replace `old` by `new` on sq (promotion and its undo); occupancy is unchanged
+    bit = 1 << sq
+    name = PIECE_FIELDS[old]
+    setattr(board, name, getattr(board, name) ^ bit)
+    name = PIECE_FIELDS[new]
+    setattr(board, name, getattr(board, name) ^ bit)
+    board.hash ^= ZOBRIST[old][sq] ^ ZOBRIST[new][sq]
+    board.material += VAL[new] - VAL[old]
+
+def do_move(board, m):
+    """Play m in place and return the captured piece code (EMPTY if none) for undo_move"""
+    from_sq, to_sq, promo = m
+    squares = board.squares
+    piece = squares[from_sq]
+    captured = squares[to_sq]
+    _xor_move(board, piece, captured, from_sq, to_sq)
+    squares[from_sq] = EMPTY
+    board.material -= VAL[captured]
+    if promo:
+        _swap_piece(board, piece, promo, to_sq)
+        squares[to_sq] = promo
+    else:
+        squares[to_sq] = piece
+    return captured
+
+def undo_move(board, m, captured):
+    from_sq, to_sq, promo = m
+    squares = board.squares
+    piece = squares[to_sq]
+    if promo:
+        pawn = PAWN | (promo & BLACK)
+        _swap_piece(board, promo, pawn, to_sq)
+        piece = pawn
+    _xor_move(board, piece, captured, from_sq, to_sq)
+    squares[from_sq] = piece
+    squares[to_sq] = captured
+    board.material += VAL[captured]
+
 def make_move(board, move_str, white_to_move):
     parsed = parse_move(board, move_str, white_to_move)
     if not parsed:
         print("Illegal or unrecognized move format.")
         return False
-    r1, c1, r2, c2 = parsed
-    if not is_pseudo_legal(board, r1, c1, r2, c2):
-        print("Illegal move geometry.")
-        return False
-    piece = board[r1][c1]
-    if white_to_move and not piece.isupper():
-        print("Illegal: it's White's turn.")
-        return False
-    if not white_to_move and not piece.islower():
-        print("Illegal: it's Black's turn.")
-        return False
-    board[r2][c2] = piece
-    board[r1][c1] = '.'
+    do_move(board, parsed)
     return True
 
 # -----------------------------------------------------
 # Simple Evaluation and Minimax
 # -----------------------------------------------------
-piece_values = {'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 0}
-
 def evaluate(board):
-    score = 0
-    for row in board:
-        for p in row:
-            if p == '.': continue
-            val = piece_values[p.upper()]
-            score += val if p.isupper() else -val
-    return score
+    return board.material
+
+def _add_moves(from_sq, targets, moves):
+    while targets:
+        to_sq = (targets & -targets).bit_length() - 1
+        targets &= targets - 1
+        moves.append((from_sq, to_sq, EMPTY))
+
+def _add_shifted(targets, delta, promos, moves):
+    # set-wise pawn moves: every target came from to_sq + delta. Landing on the last
+    # row emits one move per promotion piece.
+    while targets:
+        to_sq = (targets & -targets).bit_length() - 1
+        targets &= targets - 1
+        if PROMOTION_ROWS >> to_sq & 1:
+            for promo in promos:
+                moves.append((to_sq + delta, to_sq, promo))
+        else:
+            moves.append((to_sq + delta, to_sq, EMPTY))
+
+def gen_pawn(board, white_to_move, moves):
+    empty = ~board.all_occ & FULL_BB
+    if white_to_move:
+        pawns = board.wp
+        single = (pawns >> 8) & empty
+        _add_shifted(single, 8, WHITE_PROMOS, moves)
+        _add_shifted(((single & ROW_3) >> 8) & empty, 16, WHITE_PROMOS, moves)
+        _add_shifted(((pawns & ~FILE_A) >> 9) & board.black_occ, 9, WHITE_PROMOS, moves)
+        _add_shifted(((pawns & ~FILE_H) >> 7) & board.black_occ, 7, WHITE_PROMOS, moves)
+    else:
+        pawns = board.bp
+        single = (pawns << 8) & empty
+        _add_shifted(single, -8, BLACK_PROMOS, moves)
+        _add_shifted(((single & ROW_6) << 8) & empty, -16, BLACK_PROMOS, moves)
+        _add_shifted(((pawns & ~FILE_A) << 7) & board.white_occ, -7, BLACK_PROMOS, moves)
+        _add_shifted(((pawns & ~FILE_H) << 9) & board.white_occ, -9, BLACK_PROMOS, moves)
+
+def gen_knight(knights, not_own, moves):
+    while knights:
+        sq = (knights & -knights).bit_length() - 1
+        knights &= knights - 1
+        _add_moves(sq, KNIGHT_ATTACKS[sq] & not_own, moves)
+
+def gen_king(kings, not_own, moves):
+    while kings:
+        sq = (kings & -kings).bit_length() - 1
+        kings &= kings - 1
+        _add_moves(sq, KING_ATTACKS[sq] & not_own, moves)
+
+def gen_slider(sliders, occ, not_own, rays, moves):
+    while sliders:
+        sq = (sliders & -sliders).bit_length() - 1
+        sliders &= sliders - 1
+        _add_moves(sq, slider_attacks(sq, occ, rays) & not_own, moves)
 
 def generate_moves(board, white_to_move):
+    if _engine is not None:
+        return _engine.generate_moves(board.squares, white_to_move)
     moves = []
-    for r1 in range(8):
-        for c1 in range(8):
-            piece = board[r1][c1]
-            if piece == '.': continue
-            if white_to_move and not piece.isupper(): continue
-            if not white_to_move and not piece.islower(): continue
-            for r2 in range(8):
-                for c2 in range(8):
-                    if is_pseudo_legal(board, r1, c1, r2, c2):
-                        moves.append((r1, c1, r2, c2))
+    occ = board.all_occ
+    gen_pawn(board, white_to_move, moves)
+    if white_to_move:
+        not_own = ~board.white_occ
+        gen_knight(board.wn, not_own, moves)
+        gen_slider(board.wb, occ, not_own, BISHOP_RAYS, moves)
+        gen_slider(board.wr, occ, not_own, ROOK_RAYS, moves)
+        gen_slider(board.wq, occ, not_own, QUEEN_RAYS, moves)
+        gen_king(board.wk, not_own, moves)
+    else:
+        not_own = ~board.black_occ
+        gen_knight(board.bn, not_own, moves)
+        gen_slider(board.bb, occ, not_own, BISHOP_RAYS, moves)
+        gen_slider(board.br, occ, not_own, ROOK_RAYS, moves)
+        gen_slider(board.bq, occ, not_own, QUEEN_RAYS, moves)
+        gen_king(board.bk, not_own, moves)
     return moves
 
-def minimax(board, depth, white_to_move):
+def order_moves(board, moves):
+    """Captures and promotions first, most valuable gain then least valuable attacker (MVV-LVA)"""
+    def score(m):
+        from_sq, to_sq, promo = m
+        victim = board.squares[to_sq]
+        if victim == EMPTY and promo == EMPTY:
+            return -100
+        gain = piece_values[victim & 7] + piece_values[promo & 7]
+        return 10 * gain - piece_values[board.squares[from_sq] & 7]
+    moves.sort(key=score, reverse=True)
+
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+TT_MAX_ENTRIES = 1 << 20
+tt = {}
+
+INF = 10**9
+
+def pvs(board, depth, alpha, beta, white_to_move, prev_pv=()):
+    """
+    Principal variation search, white maximising. Returns (value, pv), pv being the best
+    line found. prev_pv (the line from the previous iteration) is searched first with the
+    full window; the remaining moves get a null window and are re-searched only when
+    they land inside (alpha, beta).
+    """
     if depth == 0:
-        return evaluate(board), None
+        return evaluate(board), []
+    key = board.hash if white_to_move else board.hash ^ ZOBRIST_SIDE
+    alpha_orig, beta_orig = alpha, beta
+    hint_move = None
+    entry = tt.get(key)
+    if entry is not None:
+        tt_depth, tt_val, flag, hint_move = entry
+        if tt_depth >= depth:
+            if flag == TT_EXACT:
+                return tt_val, [hint_move]
+            if flag == TT_LOWER:
+                alpha = max(alpha, tt_val)
+            else:
+                beta = min(beta, tt_val)
+            if alpha >= beta:
+                return tt_val, [hint_move]
     moves = generate_moves(board, white_to_move)
     if not moves:
-        return evaluate(board), None
-    best_move = None
+        return evaluate(board), []
+    order_moves(board, moves)
+    # the stored best move from an earlier visit goes first, the previous PV move before it
+    pv_move = prev_pv[0] if prev_pv else None
+    for first in (hint_move, pv_move):
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+    best_pv = []
     best_val = -9999 if white_to_move else 9999
-    for m in moves:
-        new_board = copy.deepcopy(board)
-        r1, c1, r2, c2 = m
-        new_board[r2][c2] = new_board[r1][c1]
-        new_board[r1][c1] = '.'
-        val, _ = minimax(new_board, depth - 1, not white_to_move)
-        if white_to_move and val > best_val:
-            best_val = val; best_move = m
-        if not white_to_move and val < best_val:
-            best_val = val; best_move = m
-    return best_val, best_move
+    for i, m in enumerate(moves):
+        captured = do_move(board, m)
+        if i == 0:
+            child_pv = prev_pv[1:] if m == pv_move else ()
+            val, line = pvs(board, depth - 1, alpha, beta, not white_to_move, child_pv)
+        elif white_to_move:
+            val, line = pvs(board, depth - 1, alpha, alpha + 1, False)
+            if alpha < val < beta:
+                val, line = pvs(board, depth - 1, alpha, beta, False)
+        else:
+            val, line = pvs(board, depth - 1, beta - 1, beta, True)
+            if alpha < val < beta:
+                val, line = pvs(board, depth - 1, alpha, beta, True)
+        undo_move(board, m, captured)
+        if white_to_move:
+            if val > best_val:
+                best_val = val; best_pv = [m] + line
+            alpha = max(alpha, val)
+        else:
+            if val < best_val:
+                best_val = val; best_pv = [m] + line
+            beta = min(beta, val)
+        if alpha >= beta:
+            break
+    if best_val <= alpha_orig:
+        flag = TT_UPPER
+    elif best_val >= beta_orig:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    if len(tt) >= TT_MAX_ENTRIES:
+        tt.clear()
+    tt[key] = (depth, best_val, flag, best_pv[0])
+    return best_val, best_pv
 
 def go_depth(board, depth, white_to_move):
-    val, move = minimax(board, depth, white_to_move)
-    if not move:
+    # iterative deepening: each iteration starts from the previous principal variation
+    pv = []
+    for d in range(1, depth + 1):
+        val, pv = pvs(board, d, -INF, INF, white_to_move, pv)
+    if not pv:
         print("No moves found.")
         return
-    r1, c1, r2, c2 = move
-    algebraic = index_to_square(r1, c1) + index_to_square(r2, c2)
-    print(f"Best move: {algebraic} (eval {val})")
-    board[r2][c2] = board[r1][c1]
-    board[r1][c1] = '.'
+    print(f"Best move: {move_to_str(pv[0])} (eval {val})  pv {' '.join(move_to_str(m) for m in pv)}")
+    do_move(board, pv[0])
 
 # -----------------------------------------------------
 # Perft
 # -----------------------------------------------------
-def perft(board, depth):
+def perft(board, depth, white_to_move):
+    """
+    Leaf count of the pseudo-legal move tree: moves that leave the king in check, and king
+    captures, are counted, so from depth 4 on this will not match published perft tables.
+    """
+    if _engine is not None:
+        return _engine.perft(board.squares, depth, white_to_move)
     if depth == 0:
         return 1
+    moves = generate_moves(board, white_to_move)
+    # bulk count: the leaf ply only needs the number of moves, not to play them
+    if depth == 1:
+        return len(moves)
     nodes = 0
-    for m in generate_moves(board, True):
-        new_board = copy.deepcopy(board)
-        r1, c1, r2, c2 = m
-        new_board[r2][c2] = new_board[r1][c1]
-        new_board[r1][c1] = '.'
-        nodes += perft(new_board, depth - 1)
+    for m in moves:
+        captured = do_move(board, m)
+        nodes += perft(board, depth - 1, not white_to_move)
+        undo_move(board, m, captured)
     return nodes
 
+def perft_divide(board, depth, side):
+    """
+    Print the perft count below each root move, for debugging move generation. Counts are
+    of the pseudo-legal tree (see perft) and will not match published per-move tables.
+    """
+    total = 0
+    for m in generate_moves(board, side):
+        captured = do_move(board, m)
+        nodes = perft(board, depth - 1, not side)
+        undo_move(board, m, captured)
+        print(f"{move_to_str(m)}: {nodes}")
+        total += nodes
+    print(f"Total: {total}")
+    return total
+
 # -----------------------------------------------------
 # UCI Loop
 # -----------------------------------------------------
 def uci_loop():
     board = starting_board()
     white_to_move = True
-    print("SimpleChess Engine Phase 1.4 — type e4, Nf3, nf6, go depth N, perft N, show, quit")
+    print("SimpleChess Engine Phase 1.4 — type e4, Nf3, nf6, go depth N, perft N, divide N, show, quit")
     show(board)
 
     while True:
@@ -259,7 +682,9 @@ def uci_loop():
         elif parts[0] == "perft" and len(parts) == 2:
             depth = int(parts[1])
             start = time.time()
-            print(f"Nodes: {perft(board, depth)}  Time: {time.time() - start:.3f}s")
+            print(f"Nodes: {perft(board, depth, white_to_move)}  Time: {time.time() - start:.3f}s")
+        elif parts[0] == "divide" and len(parts) == 2:
+            perft_divide(board, int(parts[1]), white_to_move)
         else:
             if make_move(board, cmd, white_to_move):
                 white_to_move = not white_to_move
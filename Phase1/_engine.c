@@ -0,0 +1,259 @@
+/*
+ * C move generator and perft for PythonEngine.py.
+ *
+ * Works on the engine's 64-byte mailbox (Position.squares): square index is row*8+col
+ * (row 0 = rank 8), piece codes are bits 0..2 = type (1 P .. 6 K), bit 3 set for black.
+ * Move generation is pseudo-legal with promotions and emits moves in the same order as
+ * the Python generate_moves, so search results do not depend on whether this module
+ * is built.
+ *
+ * Build in place with:  python setup.py build_ext --inplace
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+enum { EMPTY = 0, PAWN = 1, KNIGHT, BISHOP, ROOK, QUEEN, KING, BLACK = 8 };
+
+#define MAX_MOVES 512  /* pseudo-legal count stays well below this */
+
+typedef struct {
+    unsigned char from, to, promo;
+} Move;
+
+static const int KNIGHT_OFFSETS[8][2] = {
+    {-2, -1}, {-2, 1}, {-1, -2}, {-1, 2}, {1, -2}, {1, 2}, {2, -1}, {2, 1}};
+static const int KING_OFFSETS[8][2] = {
+    {-1, -1}, {-1, 0}, {-1, 1}, {0, -1}, {0, 1}, {1, -1}, {1, 0}, {1, 1}};
+static const int BISHOP_DIRS[4][2] = {{1, 1}, {1, -1}, {-1, -1}, {-1, 1}};
+static const int ROOK_DIRS[4][2] = {{1, 0}, {0, 1}, {-1, 0}, {0, -1}};
+
+static const uint64_t FILE_A = 0x0101010101010101ULL;
+static const uint64_t FILE_H = 0x8080808080808080ULL;
+static const uint64_t ROW_3 = 0xFFULL << 40;
+static const uint64_t ROW_6 = 0xFFULL << 16;
+static const uint64_t PROMOTION_ROWS = 0xFFULL | (0xFFULL << 56);
+
+static uint64_t KNIGHT_ATTACKS[64];
+static uint64_t KING_ATTACKS[64];
+
+static uint64_t step_mask(int sq, const int offsets[][2], int count)
+{
+    int r = sq >> 3, c = sq & 7;
+    uint64_t mask = 0;
+    for (int i = 0; i < count; i++) {
+        int r2 = r + offsets[i][0], c2 = c + offsets[i][1];
+        if (r2 >= 0 && r2 < 8 && c2 >= 0 && c2 < 8)
+            mask |= 1ULL << (r2 * 8 + c2);
+    }
+    return mask;
+}
+
+static void init_tables(void)
+{
+    for (int sq = 0; sq < 64; sq++) {
+        KNIGHT_ATTACKS[sq] = step_mask(sq, KNIGHT_OFFSETS, 8);
+        KING_ATTACKS[sq] = step_mask(sq, KING_OFFSETS, 8);
+    }
+}
+
+static uint64_t slider_mask(const unsigned char *b, int sq, const int dirs[][2])
+{
+    uint64_t mask = 0;
+    for (int d = 0; d < 4; d++) {
+        int r = (sq >> 3) + dirs[d][0], c = (sq & 7) + dirs[d][1];
+        while (r >= 0 && r < 8 && c >= 0 && c < 8) {
+            mask |= 1ULL << (r * 8 + c);
+            if (b[r * 8 + c] != EMPTY)
+                break;
+            r += dirs[d][0];
+            c += dirs[d][1];
+        }
+    }
+    return mask;
+}
+
+static int add_moves(Move *moves, int n, int from, uint64_t targets)
+{
+    while (targets) {
+        int to = __builtin_ctzll(targets);
+        targets &= targets - 1;
+        moves[n].from = (unsigned char)from;
+        moves[n].to = (unsigned char)to;
+        moves[n].promo = EMPTY;
+        n++;
+    }
+    return n;
+}
+
+/* set-wise pawn moves: every target came from to + delta */
+static int add_shifted(Move *moves, int n, uint64_t targets, int delta, int colour)
+{
+    static const int promos[4] = {QUEEN, ROOK, BISHOP, KNIGHT};
+    while (targets) {
+        int to = __builtin_ctzll(targets);
+        targets &= targets - 1;
+        if ((PROMOTION_ROWS >> to) & 1) {
+            for (int i = 0; i < 4; i++) {
+                moves[n].from = (unsigned char)(to + delta);
+                moves[n].to = (unsigned char)to;
+                moves[n].promo = (unsigned char)(promos[i] | colour);
+                n++;
+            }
+        } else {
+            moves[n].from = (unsigned char)(to + delta);
+            moves[n].to = (unsigned char)to;
+            moves[n].promo = EMPTY;
+            n++;
+        }
+    }
+    return n;
+}
+
+static int generate_moves(const unsigned char *b, int white, Move *moves)
+{
+    int colour = white ? 0 : BLACK;
+    uint64_t own = 0, enemy = 0, pieces[8] = {0};
+    for (int sq = 0; sq < 64; sq++) {
+        int p = b[sq];
+        if (p == EMPTY)
+            continue;
+        if ((p & BLACK) == colour) {
+            own |= 1ULL << sq;
+            pieces[p & 7] |= 1ULL << sq;
+        } else {
+            enemy |= 1ULL << sq;
+        }
+    }
+    uint64_t empty = ~(own | enemy), not_own = ~own;
+    uint64_t pawns = pieces[PAWN];
+    int n = 0;
+
+    if (white) {
+        uint64_t single = (pawns >> 8) & empty;
+        n = add_shifted(moves, n, single, 8, colour);
+        n = add_shifted(moves, n, ((single & ROW_3) >> 8) & empty, 16, colour);
+        n = add_shifted(moves, n, ((pawns & ~FILE_A) >> 9) & enemy, 9, colour);
+        n = add_shifted(moves, n, ((pawns & ~FILE_H) >> 7) & enemy, 7, colour);
+    } else {
+        uint64_t single = (pawns << 8) & empty;
+        n = add_shifted(moves, n, single, -8, colour);
+        n = add_shifted(moves, n, ((single & ROW_6) << 8) & empty, -16, colour);
+        n = add_shifted(moves, n, ((pawns & ~FILE_A) << 7) & enemy, -7, colour);
+        n = add_shifted(moves, n, ((pawns & ~FILE_H) << 9) & enemy, -9, colour);
+    }
+
+    for (int type = KNIGHT; type <= KING; type++) {
+        uint64_t bb = pieces[type];
+        while (bb) {
+            int sq = __builtin_ctzll(bb);
+            bb &= bb - 1;
+            uint64_t targets;
+            switch (type) {
+            case KNIGHT: targets = KNIGHT_ATTACKS[sq]; break;
+            case BISHOP: targets = slider_mask(b, sq, BISHOP_DIRS); break;
+            case ROOK: targets = slider_mask(b, sq, ROOK_DIRS); break;
+            case QUEEN: targets = slider_mask(b, sq, ROOK_DIRS) | slider_mask(b, sq, BISHOP_DIRS); break;
+            default: targets = KING_ATTACKS[sq]; break;
+            }
+            n = add_moves(moves, n, sq, targets & not_own);
+        }
+    }
+    return n;
+}
+
+static unsigned long long perft(unsigned char *b, int depth, int white)
+{
+    Move moves[MAX_MOVES];
+    int n = generate_moves(b, white, moves);
+    /* bulk count: the leaf ply only needs the number of moves */
+    if (depth == 1)
+        return (unsigned long long)n;
+    unsigned long long nodes = 0;
+    for (int i = 0; i < n; i++) {
+        int from = moves[i].from, to = moves[i].to, promo = moves[i].promo;
+        unsigned char piece = b[from], captured = b[to];
+        b[to] = promo ? (unsigned char)promo : piece;
+        b[from] = EMPTY;
+        nodes += perft(b, depth - 1, !white);
+        b[from] = piece;
+        b[to] = captured;
+    }
+    return nodes;
+}
+
+static int read_board(PyObject *obj, unsigned char *b)
+{
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_SIMPLE) < 0)
+        return -1;
+    if (view.len != 64) {
+        PyBuffer_Release(&view);
+        PyErr_SetString(PyExc_ValueError, "board must be 64 bytes");
+        return -1;
+    }
+    memcpy(b, view.buf, 64);
+    PyBuffer_Release(&view);
+    return 0;
+}
+
+static PyObject *py_perft(PyObject *self, PyObject *args)
+{
+    PyObject *board;
+    int depth, white;
+    unsigned char b[64];
+    unsigned long long nodes = 1;
+    if (!PyArg_ParseTuple(args, "Oip", &board, &depth, &white))
+        return NULL;
+    if (read_board(board, b) < 0)
+        return NULL;
+    if (depth > 0) {
+        Py_BEGIN_ALLOW_THREADS
+        nodes = perft(b, depth, white);
+        Py_END_ALLOW_THREADS
+    }
+    return PyLong_FromUnsignedLongLong(nodes);
+}
+
+static PyObject *py_generate_moves(PyObject *self, PyObject *args)
+{
+    PyObject *board;
+    int white;
+    unsigned char b[64];
+    Move moves[MAX_MOVES];
+    if (!PyArg_ParseTuple(args, "Op", &board, &white))
+        return NULL;
+    if (read_board(board, b) < 0)
+        return NULL;
+    int n = generate_moves(b, white, moves);
+    PyObject *list = PyList_New(n);
+    if (list == NULL)
+        return NULL;
+    for (int i = 0; i < n; i++) {
+        PyObject *m = Py_BuildValue("(iii)", moves[i].from, moves[i].to, moves[i].promo);
+        if (m == NULL) {
+            Py_DECREF(list);
+            return NULL;
+        }
+        PyList_SET_ITEM(list, i, m);
+    }
+    return list;
+}
+
+static PyMethodDef engine_methods[] = {
+    {"perft", py_perft, METH_VARARGS,
+     "perft(board, depth, white_to_move) -> leaf count of the pseudo-legal move tree"},
+    {"generate_moves", py_generate_moves, METH_VARARGS,
+     "generate_moves(board, white_to_move) -> list of (from_sq, to_sq, promo)"},
+    {NULL, NULL, 0, NULL}};
+
+static struct PyModuleDef engine_module = {
+    PyModuleDef_HEAD_INIT, "_engine", "C move generator and perft for PythonEngine.py", -1,
+    engine_methods};
+
+PyMODINIT_FUNC PyInit__engine(void)
+{
+    init_tables();
+    return PyModule_Create(&engine_module);
+}
@@ -0,0 +1,12 @@
+"""Builds the optional _engine C extension used by PythonEngine.py:
+
+    python setup.py build_ext --inplace
+"""
+from setuptools import setup, Extension
+
+setup(
+    name="pythonengine-ext",
+    ext_modules=[
+        Extension("_engine", ["_engine.c"], extra_compile_args=["-O3", "-march=native"]),
+    ],
+)